@@ -1,24 +1,19 @@
-import os, time, glob, datetime
+import os, time, glob, datetime, queue, threading
+from concurrent.futures import ThreadPoolExecutor
 import asf_search as asf
-import rasterio
 from shapely.geometry import box
 from pyroSAR import identify
 from pyroSAR.snap.util import geocode
 
-from helpers import clip_to_bbox4326, write_aoi_geojson_from_bbox
+from helpers import build_sar_rgb, clip_to_bbox4326, find_vv_vh_tifs, write_aoi_geojson_from_bbox
 from config import EARTHDATA_USERNAME, EARTHDATA_PASSWORD
 
 
-# ----------------------------- #
-# ---------- M A I N ---------- #
-# ----------------------------- #
-def asf_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
-    print("*** Start ASF -> pyroSAR pipeline...")
-
-    t0 = time.perf_counter()
-
-    os.makedirs(workdir, exist_ok=True)
-
+def _asf_fetch_safe(bbox4326, date_start, date_end, workdir):
+    """
+    Network stage: Earthdata auth + ASF search + SAFE zip download.
+    Kept separate from _process_safe so a batch run can overlap the two.
+    """
     # -----------------------------
     # 1) ASF SEARCH + DOWNLOAD SAFE ZIP
     # -----------------------------
@@ -61,7 +56,11 @@ def asf_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
     safe_zip = zips[0]
     print("Saved SAFE zip:", safe_zip)
 
+    return safe_zip
+
 
+def _process_safe(safe_zip, bbox4326, target_crs, workdir):
+    """CPU stage: pyroSAR/SNAP geocode of a downloaded SAFE zip, AOI clip, RGB."""
     print("4) Create geojson based on bbox...")
     aoi_path = write_aoi_geojson_from_bbox(bbox4326, os.path.join(workdir, "aoi.geojson"))
     print("AOI saved:", aoi_path)
@@ -92,8 +91,7 @@ def asf_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
         shapefile=aoi_path,
     )
 
-    vv_paths = glob.glob(os.path.join(rtc_dir, "**", "*VV*.tif"), recursive=True)
-    vh_paths = glob.glob(os.path.join(rtc_dir, "**", "*VH*.tif"), recursive=True)
+    vv_paths, vh_paths = find_vv_vh_tifs(rtc_dir)
     if not vv_paths or not vh_paths:
         raise RuntimeError("Could not find VV/VH GeoTIFFs produced by pyroSAR. Check SNAP logs.")
 
@@ -113,23 +111,106 @@ def asf_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
     vv_clip = os.path.join(dist_dir, "VV_clip.tif")
     vh_clip = os.path.join(dist_dir, "VH_clip.tif")
 
-    clip_to_bbox4326(vv_tif, vv_clip, bbox4326)
-    clip_to_bbox4326(vh_tif, vh_clip, bbox4326)
+    # VV and VH are independent I/O+CPU jobs; clip them concurrently
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fp_vv, fp_vh = pool.map(
+            lambda p: clip_to_bbox4326(*p),
+            [(vv_tif, vv_clip, bbox4326), (vh_tif, vh_clip, bbox4326)],
+        )
 
-    # Verify alignment
-    with rasterio.open(vv_clip) as a, rasterio.open(vh_clip) as b:
-        if a.crs != b.crs or a.transform != b.transform or a.width != b.width or a.height != b.height:
-            raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
+    # Verify alignment via the warp fingerprints (no dataset reopen);
+    # helpers.verify_clip_alignment does the full metadata check if needed
+    if fp_vv != fp_vh:
+        raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
 
     print("VV clipped:", vv_clip)
     print("VH clipped:", vh_clip)
 
+
+    # -----------------------------
+    # 4) RGB composite (R=VV, G=VH, B=VV-VH)
+    # -----------------------------
+    print("7) Building SAR RGB composite ...")
+    rgb_path = os.path.join(dist_dir, "RGB.tif")
+    build_sar_rgb(vv_clip, vh_clip, rgb_path, input_db=True)
+    print("RGB composite:", rgb_path)
+
     print("\nASF-pyroSAR DONE. Outputs in:", dist_dir)
 
+
+# ----------------------------- #
+# ---------- M A I N ---------- #
+# ----------------------------- #
+def asf_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
+    print("*** Start ASF -> pyroSAR pipeline...")
+
+    t0 = time.perf_counter()
+
+    os.makedirs(workdir, exist_ok=True)
+
+    safe_zip = _asf_fetch_safe(bbox4326, date_start, date_end, workdir)
+    _process_safe(safe_zip, bbox4326, target_crs, workdir)
+
     t1 = time.perf_counter()
     print(f"Total Sentinel-1 pipeline time: {(t1 - t0)/60:.2f} minutes")
 
 
+def asf_pyrosar_batch(jobs, target_crs, workdir):
+    """
+    Run several (bbox4326, date_start, date_end) jobs, overlapping the
+    download of job N+1 with the SNAP geocode of job N via a bounded queue.
+    """
+    t0 = time.perf_counter()
+
+    os.makedirs(workdir, exist_ok=True)
+
+    q = queue.Queue(maxsize=2)
+
+    def _downloader():
+        for idx, (bbox4326, date_start, date_end) in enumerate(jobs):
+            job_dir = os.path.join(workdir, f"job_{idx:02d}")
+            os.makedirs(job_dir, exist_ok=True)
+            try:
+                safe_zip = _asf_fetch_safe(bbox4326, date_start, date_end, job_dir)
+            except Exception as e:
+                q.put((idx, e))
+                continue
+            q.put((idx, (safe_zip, bbox4326, job_dir)))
+        q.put(None)
+
+    t = threading.Thread(target=_downloader, daemon=True)
+    t.start()
+
+    # One failed job must not abandon the rest: record failures per job
+    # index, keep consuming (so the downloader never blocks on a full
+    # queue), and report everything at the end
+    failures = []
+    while True:
+        got = q.get()
+        if got is None:
+            break
+        idx, payload = got
+        if isinstance(payload, Exception):
+            print(f"job_{idx:02d}: download failed: {payload}")
+            failures.append((idx, payload))
+            continue
+        safe_zip, bbox4326, job_dir = payload
+        try:
+            _process_safe(safe_zip, bbox4326, target_crs, job_dir)
+        except Exception as e:
+            print(f"job_{idx:02d}: processing failed: {e}")
+            failures.append((idx, e))
+
+    t.join()
+
+    t1 = time.perf_counter()
+    print(f"Total Sentinel-1 batch time: {(t1 - t0)/60:.2f} minutes")
+
+    if failures:
+        summary = "; ".join(f"job_{idx:02d}: {e}" for idx, e in failures)
+        raise RuntimeError(f"{len(failures)} of {len(jobs)} batch jobs failed ({summary})")
+
+
 
 if __name__ == "__main__":
     bbox4326 = [21.650108363494013, 40.66771202000291, 21.748606076871027, 40.7560964624422]
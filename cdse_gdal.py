@@ -1,14 +1,77 @@
-import os, time, zipfile, glob, datetime
-import rasterio
+import os, re, time, zipfile, datetime
+from concurrent.futures import ThreadPoolExecutor
+from osgeo import gdal
 
-from helpers import cdse_download_safe_zip, cdse_get_access_token, cdse_odata_find_s1_grdh_product, stac_find_latest_s1_grd_item, warp_gcps_clip
+from helpers import cdse_download_safe_zip, cdse_get_access_token, cdse_odata_find_s1_grdh_product, cdse_product_from_stac_item, gdal_thread_config, stac_find_latest_s1_grd_item, warp_gcps_clip
 from config import CDSE_USERNAME, CDSE_PASSWORD
 
+# GDAL cache/thread/curl tuning is applied process-wide by
+# helpers._configure_gdal_env() at import
+
 
 # ----------------------------- #
 # ----------- MAIN ------------ #
 # ----------------------------- #
-def cdse_gdal(bbox4326, date_start, date_end, workdir):
+def _safe_measurement_tifs_local(safe_zip):
+    """Resolve /vsizip/ paths to the VV/VH measurement TIFFs of a local SAFE zip."""
+    with zipfile.ZipFile(safe_zip, "r") as z:
+        names = z.namelist()
+
+    vv_members = [n for n in names if re.search(r"measurement/.*-vv-.*\.tiff$", n)]
+    vh_members = [n for n in names if re.search(r"measurement/.*-vh-.*\.tiff$", n)]
+
+    if not vv_members or not vh_members:
+        raise RuntimeError("VV or VH measurement TIFF not found in SAFE")
+
+    safe_zip_abs = os.path.abspath(safe_zip)
+    return f"/vsizip/{safe_zip_abs}/{vv_members[0]}", f"/vsizip/{safe_zip_abs}/{vh_members[0]}"
+
+
+def _zipper_stream_config(token):
+    """
+    Thread-local GDAL config for streaming from the zipper endpoint. The
+    bearer token must not ride on unrelated GDAL HTTP traffic (it would
+    clash with AWS request signing on /vsis3/ reads and park a credential in
+    global state), so callers apply this via gdal_thread_config around each
+    streamed open/warp.
+    """
+    return {"GDAL_HTTP_HEADERS": f"Authorization: Bearer {token}"}
+
+
+def _safe_measurement_tifs_remote(product_id, product_name, token):
+    """
+    Resolve /vsizip//vsicurl/ paths to the VV/VH measurement TIFFs inside the
+    remote SAFE zip, without downloading the archive: curl range reads pull
+    the zip central directory and then only the TIFF blocks the warp touches.
+    """
+    # The $value URL has no file extension, so any ambient allowed-extensions
+    # filter would make curl refuse it outright; clear it rather than rely on
+    # no other module having set it
+    gdal.SetConfigOption("CPL_VSIL_CURL_ALLOWED_EXTENSIONS", None)
+
+    # Brace form: /vsizip/ normally finds the archive boundary by looking for
+    # a .zip-style extension, which the $value URL does not have
+    url = (
+        "https://zipper.dataspace.copernicus.eu/odata/v1"
+        f"/Products({product_id})/$value"
+    )
+    base = f"/vsizip/{{/vsicurl/{url}}}/{product_name}/measurement"
+
+    with gdal_thread_config(_zipper_stream_config(token)):
+        names = gdal.ReadDir(base)
+    if not names:
+        raise RuntimeError(f"Could not list {base}; check token and product id.")
+
+    vv_members = [n for n in names if re.search(r"-vv-.*\.tiff$", n)]
+    vh_members = [n for n in names if re.search(r"-vh-.*\.tiff$", n)]
+
+    if not vv_members or not vh_members:
+        raise RuntimeError("VV or VH measurement TIFF not found in SAFE")
+
+    return f"{base}/{vv_members[0]}", f"{base}/{vh_members[0]}"
+
+
+def cdse_gdal(bbox4326, date_start, date_end, workdir, stream=False):
     print("*** Start CDSE -> GDAL pipeline...")
 
     t0 = time.perf_counter()
@@ -26,41 +89,36 @@ def cdse_gdal(bbox4326, date_start, date_end, workdir):
 
     stac_id = item.id
 
-    product_id, product_name = cdse_odata_find_s1_grdh_product(bbox4326, stac_id)
+    # The STAC item usually carries the OData Id already; only fall back to
+    # the extra catalogue query when it doesn't
+    product = cdse_product_from_stac_item(item)
+    if product is None:
+        product = cdse_odata_find_s1_grdh_product(bbox4326, stac_id)
+    product_id, product_name = product
 
     print("Matched OData product:", product_name, "Id:", product_id)
 
-    out_zip = os.path.join(workdir, f"{product_name}.zip")
-
     token = cdse_get_access_token(CDSE_USERNAME, CDSE_PASSWORD)
 
-    print("2) Download SAFE ZIP (OData $zip)...")
-    safe_zip = cdse_download_safe_zip(product_id, out_zip, token)
-
     # -----------------------------
-    # 2) GDAL turn SAFE.zip into VV/VH clipped GeoTIFFs
+    # 2) Resolve VV/VH measurement TIFFs inside the SAFE zip
     # -----------------------------
-    print("3) GDAL -> GeoTIFF VV/VH...")
-    extract_dir = os.path.join(workdir, "extract")
-    os.makedirs(extract_dir, exist_ok=True)
-
-    safe_name = os.path.basename(safe_zip).replace(".zip", "")
-    safe_dir = os.path.join(extract_dir, safe_name)
-
-    if not os.path.exists(safe_dir):
-        with zipfile.ZipFile(safe_zip, "r") as z:
-            z.extractall(extract_dir)
-
-    meas_dir = os.path.join(safe_dir, "measurement")
-
-    vv_files = glob.glob(os.path.join(meas_dir, "*-vv-*.tiff"))
-    vh_files = glob.glob(os.path.join(meas_dir, "*-vh-*.tiff"))
+    if stream:
+        # Only the clipped windows of the two measurement TIFFs ever cross
+        # the wire; the rest of the ~1 GB SAFE archive is never fetched
+        print("2) Streaming SAFE measurement TIFFs (/vsizip//vsicurl/)...")
+        vv_tif, vh_tif = _safe_measurement_tifs_remote(product_id, product_name, token)
+    else:
+        out_zip = os.path.join(workdir, f"{product_name}.zip")
+
+        print("2) Download SAFE ZIP (OData $zip)...")
+        safe_zip = cdse_download_safe_zip(product_id, out_zip, token)
+
+        # No unzip to disk: GDAL's /vsizip/ VFS reads the TIFF blocks
+        # straight out of the archive with random access
+        print("3) GDAL -> GeoTIFF VV/VH (via /vsizip/, no extraction)...")
+        vv_tif, vh_tif = _safe_measurement_tifs_local(safe_zip)
 
-    if not vv_files or not vh_files:
-        raise RuntimeError("VV or VH measurement TIFF not found in SAFE")
-
-    vv_tif = vv_files[0]
-    vh_tif = vh_files[0]
     print("RAW VV:", vv_tif)
     print("RAW VH:", vh_tif)
 
@@ -74,14 +132,26 @@ def cdse_gdal(bbox4326, date_start, date_end, workdir):
     vv_clip = os.path.join(dist_dir, "VV_clip.tif")
     vh_clip = os.path.join(dist_dir, "VH_clip.tif")
 
-    warp_gcps_clip(vv_tif, vv_clip, bbox4326)
-    warp_gcps_clip(vh_tif, vh_clip, bbox4326)
+    warp_config = _zipper_stream_config(token) if stream else {}
+
+    def _warp(p):
+        # Streamed reads need the bearer token in this worker thread;
+        # thread-local options don't propagate into pool threads
+        with gdal_thread_config(warp_config):
+            return warp_gcps_clip(*p)
+
+    # VV and VH are independent warp jobs (GDAL releases the GIL); run both at once
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fp_vv, fp_vh = pool.map(
+            _warp,
+            [(vv_tif, vv_clip, bbox4326), (vh_tif, vh_clip, bbox4326)],
+        )
 
 
-    # Verify alignment
-    with rasterio.open(vv_clip) as a, rasterio.open(vh_clip) as b:
-        if a.crs != b.crs or a.transform != b.transform or a.width != b.width or a.height != b.height:
-            raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
+    # Verify alignment via the warp fingerprints (no dataset reopen);
+    # helpers.verify_clip_alignment does the full metadata check if needed
+    if fp_vv != fp_vh:
+        raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
 
     print("VV clipped:", vv_clip)
     print("VH clipped:", vh_clip)
@@ -1,10 +1,10 @@
-import os, glob, time
+import os, time, queue, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import rasterio
 from pyroSAR import identify
 from pyroSAR.snap.util import geocode
 
-from helpers import cdse_download_safe_zip, cdse_get_access_token, cdse_odata_find_s1_grdh_product, clip_to_bbox4326, stac_find_latest_s1_grd_item, write_aoi_geojson_from_bbox
+from helpers import cdse_download_safe_zip, cdse_get_access_token, cdse_odata_find_s1_grdh_product, cdse_product_from_stac_item, clip_to_bbox4326, find_vv_vh_tifs, stac_find_latest_s1_grd_item, write_aoi_geojson_from_bbox
 from config import CDSE_USERNAME, CDSE_PASSWORD
 
 
@@ -31,18 +31,13 @@ def pyrosar_rtc_geocode_safe_zip(safe_zip, rtc_dir, aoi_path, target_crs=4326, s
     )
 
 
-# ----------------------------- #
-# ----------- MAIN ------------ #
-# ----------------------------- #
-def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
-    print("*** Start CDSE -> pyroSAR pipeline...")
-
-    t0 = time.perf_counter()
-
+def _cdse_fetch_safe(bbox4326, date_start, date_end, workdir):
+    """
+    Network stage: STAC search + OData match + SAFE zip download.
+    Kept separate from _process_safe so a batch run can overlap the two.
+    """
     datetime_range = f"{date_start}/{date_end}"
 
-    os.makedirs(workdir, exist_ok=True)
-
     # -----------------------------
     # 1) STAC SEARCH + DOWNLOAD SAFE ZIP
     # -----------------------------
@@ -52,7 +47,12 @@ def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
 
     stac_id = item.id
 
-    product_id, product_name = cdse_odata_find_s1_grdh_product(bbox4326, stac_id)
+    # The STAC item usually carries the OData Id already; only fall back to
+    # the extra catalogue query when it doesn't
+    product = cdse_product_from_stac_item(item)
+    if product is None:
+        product = cdse_odata_find_s1_grdh_product(bbox4326, stac_id)
+    product_id, product_name = product
 
     print("Matched OData product:", product_name, "Id:", product_id)
 
@@ -61,8 +61,11 @@ def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
     token = cdse_get_access_token(CDSE_USERNAME, CDSE_PASSWORD)
 
     print("2) Download SAFE ZIP (OData $zip)...")
-    safe_zip = cdse_download_safe_zip(product_id, out_zip, token)
+    return cdse_download_safe_zip(product_id, out_zip, token)
 
+
+def _process_safe(safe_zip, bbox4326, target_crs, workdir):
+    """CPU stage: pyroSAR/SNAP geocode of a downloaded SAFE zip plus AOI clip."""
     print("3) Create geojson based on bbox...")
     aoi_path = write_aoi_geojson_from_bbox(bbox4326, os.path.join(workdir, "aoi.geojson"))
     print("AOI saved:", aoi_path)
@@ -74,9 +77,8 @@ def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
     rtc_dir = os.path.join(workdir, "rtc_out")
     pyrosar_rtc_geocode_safe_zip(safe_zip, rtc_dir, aoi_path, target_crs)
 
-    # Find VV/VH outputs produced by pyroSAR (simple glob)
-    vv_paths = glob.glob(os.path.join(rtc_dir, "**", "*VV*.tif"), recursive=True)
-    vh_paths = glob.glob(os.path.join(rtc_dir, "**", "*VH*.tif"), recursive=True)
+    # Find VV/VH outputs produced by pyroSAR (single tree walk)
+    vv_paths, vh_paths = find_vv_vh_tifs(rtc_dir)
     if not vv_paths or not vh_paths:
         raise RuntimeError(f"Could not find VV/VH GeoTIFFs under {rtc_dir}. Check SNAP/pyroSAR logs.")
 
@@ -96,23 +98,97 @@ def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
     vv_clip = os.path.join(dist_dir, "VV_clip.tif")
     vh_clip = os.path.join(dist_dir, "VH_clip.tif")
 
-    clip_to_bbox4326(vv_tif, vv_clip, bbox4326)
-    clip_to_bbox4326(vh_tif, vh_clip, bbox4326)
+    # VV and VH are independent I/O+CPU jobs; clip them concurrently
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fp_vv, fp_vh = pool.map(
+            lambda p: clip_to_bbox4326(*p),
+            [(vv_tif, vv_clip, bbox4326), (vh_tif, vh_clip, bbox4326)],
+        )
 
-    # Verify alignment
-    with rasterio.open(vv_clip) as a, rasterio.open(vh_clip) as b:
-        if a.crs != b.crs or a.transform != b.transform or a.width != b.width or a.height != b.height:
-            raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
+    # Verify alignment via the warp fingerprints (no dataset reopen);
+    # helpers.verify_clip_alignment does the full metadata check if needed
+    if fp_vv != fp_vh:
+        raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
 
     print("VV clipped:", vv_clip)
     print("VH clipped:", vh_clip)
 
     print("\nCDSE-pyroSAR DONE. Outputs in:", dist_dir)
 
+
+# ----------------------------- #
+# ----------- MAIN ------------ #
+# ----------------------------- #
+def cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir):
+    print("*** Start CDSE -> pyroSAR pipeline...")
+
+    t0 = time.perf_counter()
+
+    os.makedirs(workdir, exist_ok=True)
+
+    safe_zip = _cdse_fetch_safe(bbox4326, date_start, date_end, workdir)
+    _process_safe(safe_zip, bbox4326, target_crs, workdir)
+
     t1 = time.perf_counter()
     print(f"Total Sentinel-1 pipeline time: {(t1 - t0)/60:.2f} minutes")
 
 
+def cdse_pyrosar_batch(jobs, target_crs, workdir):
+    """
+    Run several (bbox4326, date_start, date_end) jobs, overlapping the
+    download of job N+1 with the SNAP geocode of job N via a bounded queue.
+    """
+    t0 = time.perf_counter()
+
+    os.makedirs(workdir, exist_ok=True)
+
+    q = queue.Queue(maxsize=2)
+
+    def _downloader():
+        for idx, (bbox4326, date_start, date_end) in enumerate(jobs):
+            job_dir = os.path.join(workdir, f"job_{idx:02d}")
+            os.makedirs(job_dir, exist_ok=True)
+            try:
+                safe_zip = _cdse_fetch_safe(bbox4326, date_start, date_end, job_dir)
+            except Exception as e:
+                q.put((idx, e))
+                continue
+            q.put((idx, (safe_zip, bbox4326, job_dir)))
+        q.put(None)
+
+    t = threading.Thread(target=_downloader, daemon=True)
+    t.start()
+
+    # One failed job must not abandon the rest: record failures per job
+    # index, keep consuming (so the downloader never blocks on a full
+    # queue), and report everything at the end
+    failures = []
+    while True:
+        got = q.get()
+        if got is None:
+            break
+        idx, payload = got
+        if isinstance(payload, Exception):
+            print(f"job_{idx:02d}: download failed: {payload}")
+            failures.append((idx, payload))
+            continue
+        safe_zip, bbox4326, job_dir = payload
+        try:
+            _process_safe(safe_zip, bbox4326, target_crs, job_dir)
+        except Exception as e:
+            print(f"job_{idx:02d}: processing failed: {e}")
+            failures.append((idx, e))
+
+    t.join()
+
+    t1 = time.perf_counter()
+    print(f"Total Sentinel-1 batch time: {(t1 - t0)/60:.2f} minutes")
+
+    if failures:
+        summary = "; ".join(f"job_{idx:02d}: {e}" for idx, e in failures)
+        raise RuntimeError(f"{len(failures)} of {len(jobs)} batch jobs failed ({summary})")
+
+
 
 if __name__ == "__main__":
     bbox4326 = [21.650108363494013, 40.66771202000291, 21.748606076871027, 40.7560964624422]
@@ -1,13 +1,25 @@
 import os, time, datetime
-import rasterio
+from concurrent.futures import ThreadPoolExecutor
 from pystac_client import Client
-import boto3
-from botocore.config import Config
 
-from helpers import warp_gcps_clip
+from helpers import gdal_thread_config, warp_gcps_clip
 from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
 
 
+# EOData S3 access for /vsis3/ range reads: gdal.Warp only fetches the COG
+# tiles overlapping the AOI instead of the whole file. Applied thread-locally
+# around the warps, not at import: process-wide credentials and curl filters
+# would leak into every other pipeline sharing the interpreter
+_EODATA_S3_CONFIG = {
+    "AWS_S3_ENDPOINT": "eodata.dataspace.copernicus.eu",
+    "AWS_ACCESS_KEY_ID": AWS_ACCESS_KEY_ID,
+    "AWS_SECRET_ACCESS_KEY": AWS_SECRET_ACCESS_KEY,
+    "AWS_VIRTUAL_HOSTING": "FALSE",
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.tiff",
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+}
+
+
 
 # ----------------------------- #
 # ----------- MAIN ------------ #
@@ -22,10 +34,9 @@ def cog_gdal(bbox4326, date_start, date_end, workdir):
     os.makedirs(workdir, exist_ok=True)
 
     # -----------------------------
-    # 1) STAC SEARCH + DOWNLOAD SAFE ZIP
+    # 1) STAC SEARCH
     # -----------------------------
     print("1) STAC search...")
-    ENDPOINT = "https://eodata.dataspace.copernicus.eu"
     catalog = Client.open("https://catalogue.dataspace.copernicus.eu/stac")
 
     search = catalog.search(
@@ -48,25 +59,12 @@ def cog_gdal(bbox4326, date_start, date_end, workdir):
     key_vv = s3_vv_url.replace("s3://eodata/", "")
     key_vh = s3_vh_url.replace("s3://eodata/", "")
 
-    s3 = boto3.client(
-        "s3",
-        endpoint_url= ENDPOINT,
-        aws_access_key_id= AWS_ACCESS_KEY_ID,
-        aws_secret_access_key= AWS_SECRET_ACCESS_KEY,
-        config=Config(signature_version= "s3v4"),
-    )
-
-
-    cog_dir = os.path.join(workdir, "cog")
-    os.makedirs(cog_dir, exist_ok=True)
-
-    vv_tif = os.path.join(cog_dir, "VV.tif")
-    vh_tif = os.path.join(cog_dir, "VH.tif")
-
-    print("2) Download COG TIFFs...")
-    s3.download_file(bucket, key_vv, vv_tif)
-    s3.download_file(bucket, key_vh, vh_tif)
+    # No full download: /vsis3/ does HTTP range reads, so the warp below pulls
+    # only the tiles overlapping bbox4326
+    vv_tif = f"/vsis3/{bucket}/{key_vv}"
+    vh_tif = f"/vsis3/{bucket}/{key_vh}"
 
+    print("2) Streaming COG TIFFs via /vsis3/ ...")
     print("RAW VV COG:", vv_tif)
     print("RAW VH COG:", vh_tif)
 
@@ -81,14 +79,24 @@ def cog_gdal(bbox4326, date_start, date_end, workdir):
     vv_clip = os.path.join(dist_dir, "VV_clip.tif")
     vh_clip = os.path.join(dist_dir, "VH_clip.tif")
 
-    warp_gcps_clip(vv_tif, vv_clip, bbox4326)
-    warp_gcps_clip(vh_tif, vh_clip, bbox4326)
+    def _warp(p):
+        # The S3 config must be set in the worker thread itself: thread-local
+        # options do not propagate into pool threads
+        with gdal_thread_config(_EODATA_S3_CONFIG):
+            return warp_gcps_clip(*p)
+
+    # VV and VH are independent warp jobs (GDAL releases the GIL); run both at once
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fp_vv, fp_vh = pool.map(
+            _warp,
+            [(vv_tif, vv_clip, bbox4326), (vh_tif, vh_clip, bbox4326)],
+        )
 
 
-    # Verify alignment
-    with rasterio.open(vv_clip) as a, rasterio.open(vh_clip) as b:
-        if a.crs != b.crs or a.transform != b.transform or a.width != b.width or a.height != b.height:
-            raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
+    # Verify alignment via the warp fingerprints (no dataset reopen);
+    # helpers.verify_clip_alignment does the full metadata check if needed
+    if fp_vv != fp_vh:
+        raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
 
     print("VV clipped:", vv_clip)
     print("VH clipped:", vh_clip)
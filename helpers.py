@@ -1,17 +1,80 @@
-import os, re, json, glob, time
+import os, re, json, glob, base64, hashlib, math, time, threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
 import urllib.parse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
+import numexpr as ne
+from numba import njit, prange
 import rasterio
-from rasterio.mask import mask
+from rasterio.enums import Resampling
 from shapely.geometry import box, mapping
 from shapely.ops import transform as shp_transform
 from pyproj import Transformer
 from pystac_client import Client
-from osgeo import gdal
+from osgeo import gdal, osr
 
 
+def _configure_gdal_env():
+    """
+    Process-wide GDAL tuning, applied once at import so every pipeline
+    (rasterio and osgeo.gdal alike) picks it up:
+    - 10 MB curl range reads instead of the 16 KB default, which is terrible
+      on high-latency links (/vsicurl/, /vsis3/, /vsizip//vsicurl/)
+    - a curl block cache of 128 chunks so re-reads stay local
+    - 1 MB ingested at open to resolve the TIFF header in a single GET
+    - 25% block cache and multi-threaded block decoding
+    """
+    for key, val in (
+        ("CPL_VSIL_CURL_CHUNK_SIZE", "10485760"),
+        ("CPL_VSIL_CURL_CACHE_SIZE", "1342177280"),
+        ("GDAL_INGESTED_BYTES_AT_OPEN", "1048576"),
+        ("GDAL_CACHEMAX", "25%"),
+        ("GDAL_NUM_THREADS", "ALL_CPUS"),
+        ("VSI_CACHE", "TRUE"),
+        ("VSI_CACHE_SIZE", "268435456"),
+    ):
+        gdal.SetConfigOption(key, val)
+        os.environ.setdefault(key, val)
+
+
+_configure_gdal_env()
+
+
+@contextmanager
+def gdal_thread_config(options):
+    """
+    Apply GDAL config options to the calling thread only, clearing them on
+    exit. Pipeline-specific state (S3 credentials, HTTP headers, curl
+    filters) must not leak into other pipelines sharing the interpreter,
+    e.g. when run_jobs drives several of them concurrently.
+    """
+    for key, val in options.items():
+        gdal.SetThreadLocalConfigOption(key, val)
+    try:
+        yield
+    finally:
+        for key in options:
+            gdal.SetThreadLocalConfigOption(key, None)
+
+
+# One GeoTIFF layout for every intermediate/output raster: 512x512 tiles,
+# multi-threaded ZSTD. Callers append PREDICTOR when the band type warrants it
+GTIFF_CREATION_OPTIONS = [
+    "TILED=YES",
+    "BLOCKXSIZE=512",
+    "BLOCKYSIZE=512",
+    "COMPRESS=ZSTD",
+    "ZSTD_LEVEL=3",
+    "NUM_THREADS=ALL_CPUS",
+    "BIGTIFF=IF_SAFER",
+]
+
 
 def write_aoi_geojson_from_bbox(bbox4326, out_geojson="aoi.geojson"):
     geom = mapping(box(*bbox4326))
@@ -21,8 +84,8 @@ def write_aoi_geojson_from_bbox(bbox4326, out_geojson="aoi.geojson"):
             {"type": "Feature", "properties": {}, "geometry": geom}
         ],
     }
-    with open(out_geojson, "w") as f:
-        json.dump(fc, f)
+    with open(out_geojson, "wb") as f:
+        f.write(orjson.dumps(fc))
     return out_geojson
 
 
@@ -36,55 +99,438 @@ def bbox4326_to_odata_polygon(bbox):
     )
 
 
-def to_db(x):
+def to_db(x, out=None):
     # If data is already in dB skip this
     # dB is when: np.nanmin(vv), np.nanmax(vv) gives -35 -> +5
-    return 10.0 * np.log10(np.maximum(x, 1e-10))
+    # out= may alias x for a zero-allocation conversion
+    x = np.asarray(x)
+    if x.dtype != np.float32:
+        # float64/integer inputs double the bytes moved per pass; convert once
+        x = x.astype(np.float32)
+    if out is None:
+        out = np.empty_like(x)
+    np.maximum(x, 1e-10, out=out)
+    np.log10(out, out=out)
+    np.multiply(out, 10.0, out=out)
+    return out
+
+# Reusable scratch buffers keyed on (shape, dtype): window shapes repeat
+# across the block loop, so the stretch stage allocates nothing after the
+# first tile. Thread-local so concurrent window workers don't share buffers.
+_scratch = threading.local()
+
+
+def _scratch_buf(shape, dtype=np.float32, tag=""):
+    cache = getattr(_scratch, "bufs", None)
+    if cache is None:
+        cache = _scratch.bufs = {}
+    key = (shape, np.dtype(dtype).str, tag)
+    return cache.setdefault(key, np.empty(shape, dtype))
+
+
+@njit(inline="always", cache=True)
+def _pack_u8(v):
+    # Branchless clamp+quantize: min/max compile to vector min/max ops, so
+    # the surrounding prange loop stays vectorizable
+    return np.uint8(min(255.0, max(0.0, v * 255.0 + 0.5)))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _rgb_kernel(vv, vh, nd_vv, nd_vh, has_nd, input_db,
+                lo_vv, s_vv, lo_vh, s_vh, lo_r, s_r, out):
+    # One fused pass: reads VV/VH once, writes R/G/B once. Replaces the
+    # mask -> dB -> ratio -> 3x stretch -> clip -> pack NumPy chain and its
+    # intermediate full-window passes.
+    for i in prange(vv.shape[0]):
+        for j in range(vv.shape[1]):
+            a = np.float64(vv[i, j])
+            b = np.float64(vh[i, j])
+            if has_nd and (a == nd_vv or b == nd_vh):
+                out[0, i, j] = 0
+                out[1, i, j] = 0
+                out[2, i, j] = 0
+                continue
+            if not input_db:
+                a = 10.0 * math.log10(max(a, 1e-10))
+                b = 10.0 * math.log10(max(b, 1e-10))
+            out[0, i, j] = _pack_u8((a - lo_vv) * s_vv)
+            out[1, i, j] = _pack_u8((b - lo_vh) * s_vh)
+            out[2, i, j] = _pack_u8((a - b - lo_r) * s_r)
+
+
+def _hist_percentiles(x, pmin, pmax, bins=65536):
+    """
+    Approximate percentiles via histogram + CDF inversion: one O(N) pass in
+    native dtype instead of nanpercentile's partition with float64 promotion.
+    At 65536 bins the quantization error is irrelevant for a 2/98 stretch.
+    """
+    finite = x[np.isfinite(x)]
+    if finite.size == 0:
+        return 0.0, 1.0
+    mn, mx = float(finite.min()), float(finite.max())
+    if mn == mx:
+        return mn, mx
+    counts, edges = np.histogram(finite, bins=bins, range=(mn, mx))
+    cdf = np.cumsum(counts)
+    total = cdf[-1]
+    lo = edges[np.searchsorted(cdf, total * pmin / 100.0)]
+    hi = edges[min(np.searchsorted(cdf, total * pmax / 100.0) + 1, bins)]
+    return float(lo), float(hi)
+
+
+def stretch01(x, lo=None, hi=None, pmin=2, pmax=98, out=None):
+    # Pass precomputed lo/hi (e.g. from a decimated overview) to keep the
+    # percentile out of the hot loop; out= may alias x
+    x = np.asarray(x)
+    if x.dtype != np.float32:
+        # Same reasoning as to_db: float64 doubles the bytes every pass moves
+        x = x.astype(np.float32)
+    if lo is None or hi is None:
+        lo, hi = _hist_percentiles(x, pmin, pmax)
+    if out is None:
+        out = np.empty_like(x)
+    scalars = {
+        "x": x,
+        "lo": np.float32(lo),
+        "s": np.float32(1.0 / (hi - lo + 1e-12)),
+        "zero": np.float32(0.0),
+        "one": np.float32(1.0),
+    }
+    # Clamp inside the same expression (numexpr CSEs the repeated term), so
+    # normalize+clip is one multithreaded traversal instead of two passes
+    ne.evaluate(
+        "where((x - lo) * s < zero, zero,"
+        " where((x - lo) * s > one, one, (x - lo) * s))",
+        local_dict=scalars,
+        out=out,
+    )
+    return out
+
+
+# fastmath as an explicit flag set: nnan must stay OFF or NaN nodata pixels
+# would be folded into the histogram (and emitted as 0) instead of preserved
+@njit(parallel=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"}, cache=True)
+def _to_db_stretch01_kernel(x, pmin, pmax, out):
+    # Pass 1: per-chunk int16 fixed-point histograms of the dB values
+    # (merged afterwards), pass 2: normalize. Two streaming passes total
+    # instead of the 4+ of the separate to_db/stretch01 helpers.
+    n0, n1 = x.shape
+    nchunks = 16
+    hists = np.zeros((nchunks, 65536), np.int64)
+    for c in prange(nchunks):
+        i0 = c * n0 // nchunks
+        i1 = (c + 1) * n0 // nchunks
+        for i in range(i0, i1):
+            for j in range(n1):
+                val = x[i, j]
+                # Test the input: max(NaN, eps) already loses the NaN, so a
+                # NaN check on v after the fact would never fire
+                if not np.isnan(val):
+                    v = 10.0 * math.log10(max(val, 1e-10))
+                    q = int(min(32767.0, max(-32768.0, v * 100.0)))
+                    hists[c, q + 32768] += 1
+
+    hist = np.zeros(65536, np.int64)
+    for c in range(nchunks):
+        for b in range(65536):
+            hist[b] += hists[c, b]
+
+    cdf = np.cumsum(hist)
+    total = cdf[-1]
+    if total == 0:
+        lo, hi = 0.0, 1.0
+    else:
+        lo = (np.searchsorted(cdf, total * pmin / 100.0) - 32768) / 100.0
+        hi = (np.searchsorted(cdf, total * pmax / 100.0) - 32768) / 100.0
+    s = 1.0 / (hi - lo + 1e-12)
+
+    for i in prange(n0):
+        for j in range(n1):
+            val = x[i, j]
+            if np.isnan(val):
+                out[i, j] = np.nan
+            else:
+                v = 10.0 * math.log10(max(val, 1e-10))
+                out[i, j] = min(1.0, max(0.0, (v - lo) * s))
+
+
+def to_db_stretch01(x, pmin=2, pmax=98, out=None):
+    """
+    Fused to_db + stretch01 for a full array: one parallel kernel that
+    histograms the dB values and rescales them, rather than chaining the
+    separate helpers with their intermediate full-size temporaries.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    if out is None:
+        out = np.empty_like(x)
+    _to_db_stretch01_kernel(x, float(pmin), float(pmax), out)
+    return out
+
+
+def _masked_db(x, nodata, input_db=False):
+    # Boolean mask (1 byte/px) + in-place NaN assignment instead of a full
+    # np.where float copy (4 bytes/px); the dB pass stays a fused numexpr
+    # expression writing back into the input buffer
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    mask = None
+    if nodata is not None:
+        mask = x == np.float32(nodata)
+    if not input_db:
+        scalars = {"x": x, "eps": np.float32(1e-10)}
+        ne.evaluate("10 * log10(where(x > eps, x, eps))", local_dict=scalars, out=x)
+    if mask is not None:
+        x[mask] = np.nan
+    return x
+
+
+def find_vv_vh_tifs(root):
+    """
+    Collect pyroSAR VV/VH GeoTIFF outputs in one scandir walk: one tree
+    traversal (with cached DirEntry stats) instead of two recursive globs.
+    """
+    vv, vh = [], []
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.endswith(".tif"):
+                    if "VV" in e.name:
+                        vv.append(e.path)
+                    elif "VH" in e.name:
+                        vh.append(e.path)
+    return sorted(vv), sorted(vh)
+
+
+def _db_percentiles_i16(db, pmin, pmax):
+    """
+    Percentiles of a dB array via a 65k-bin histogram on x100 int16 fixed
+    point: one O(N) bincount instead of a sort, and 0.01 dB resolution is far
+    below what a 2/98 stretch can resolve anyway.
+    """
+    q = np.rint(db[np.isfinite(db)] * 100.0).astype(np.int32)
+    np.clip(q, -32768, 32767, out=q)
+    counts = np.bincount(q + 32768, minlength=65536)
+    cdf = np.cumsum(counts)
+    total = cdf[-1]
+    if total == 0:
+        return 0.0, 1.0
+    lo_idx = np.searchsorted(cdf, total * pmin / 100.0)
+    hi_idx = np.searchsorted(cdf, total * pmax / 100.0)
+    return (lo_idx - 32768) / 100.0, (hi_idx - 32768) / 100.0
+
+
+def build_sar_rgb(vv_path, vh_path, rgb_path, pmin=2, pmax=98, input_db=False):
+    """
+    Build an RGB composite (R=VV, G=VH, B=VV-VH, all in dB) from clipped VV/VH rasters.
+    Streams over block windows so peak memory stays at one tile instead of the full scene.
+    Set input_db=True when the inputs are already dB-scaled (e.g. pyroSAR scaling="dB").
+    """
+    # Default GDAL settings (40MB block cache, single-threaded codecs) force
+    # re-decompression of ZSTD tiles that could stay resident
+    env = rasterio.Env(GDAL_CACHEMAX=1024, GDAL_NUM_THREADS="ALL_CPUS")
+    with env, rasterio.open(vv_path) as src_vv, rasterio.open(vh_path) as src_vh:
+        H, W = src_vv.height, src_vv.width
+
+        # One cheap pass on decimated overviews to fix global lo/hi per channel,
+        # instead of a full-raster nanpercentile: 1/16 per axis = 256x fewer samples
+        ov_shape = (max(1, H // 16), max(1, W // 16))
+        vv_ov = _masked_db(
+            src_vv.read(1, out_shape=ov_shape, resampling=Resampling.average),
+            src_vv.nodata, input_db,
+        )
+        vh_ov = _masked_db(
+            src_vh.read(1, out_shape=ov_shape, resampling=Resampling.average),
+            src_vh.nodata, input_db,
+        )
+
+        lo_vv, hi_vv = _db_percentiles_i16(vv_ov, pmin, pmax)
+        lo_vh, hi_vh = _db_percentiles_i16(vh_ov, pmin, pmax)
+        lo_r, hi_r = _db_percentiles_i16(vv_ov - vh_ov, pmin, pmax)
+
+        profile = src_vv.profile.copy()
+        profile.update(
+            count=3,
+            dtype="uint8",
+            nodata=0,
+            tiled=True,
+            blockxsize=512,
+            blockysize=512,
+            compress="ZSTD",
+            predictor=2,
+            num_threads="ALL_CPUS",
+        )
+
+        has_nd = src_vv.nodata is not None or src_vh.nodata is not None
+        nd_vv = float(src_vv.nodata) if src_vv.nodata is not None else 0.0
+        nd_vh = float(src_vh.nodata) if src_vh.nodata is not None else 0.0
+        s_vv = 1.0 / (hi_vv - lo_vv + 1e-12)
+        s_vh = 1.0 / (hi_vh - lo_vh + 1e-12)
+        s_r = 1.0 / (hi_r - lo_r + 1e-12)
+
+        dt_vv = np.dtype(src_vv.dtypes[0])
+        dt_vh = np.dtype(src_vh.dtypes[0])
+
+        with rasterio.open(rgb_path, "w", **profile) as dst:
+            # Process windows on a small thread pool so tile decode/encode
+            # overlaps the kernel; dataset handles are not thread-safe, so
+            # reads and writes each go through a lock (the standard rasterio
+            # concurrency pattern)
+            read_lock = threading.Lock()
+            write_lock = threading.Lock()
+            # The parallel=True kernel already saturates the cores, and
+            # numba's default (workqueue) threading layer aborts the process
+            # outright on concurrent entry — only tbb tolerates it. Serialize
+            # the kernel and let the pool overlap just the tile decode/encode.
+            kernel_lock = threading.Lock()
+
+            def _do_window(win):
+                shape = (int(win.height), int(win.width))
+                with read_lock:
+                    vv = src_vv.read(1, window=win, out=_scratch_buf(shape, dt_vv, "vv"))
+                    vh = src_vh.read(1, window=win, out=_scratch_buf(shape, dt_vh, "vh"))
+
+                out = _scratch_buf((3,) + shape, np.uint8)
+                with kernel_lock:
+                    _rgb_kernel(vv, vh, nd_vv, nd_vh, has_nd, input_db,
+                                lo_vv, s_vv, lo_vh, s_vh, lo_r, s_r, out)
+
+                with write_lock:
+                    write_rgb_geotiff(dst, out, win)
+
+            windows = [win for _, win in dst.block_windows(1)]
+            with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+                list(pool.map(_do_window, windows))
+
+            # Internal overviews make the output a proper COG: downstream
+            # viewers/clips read decimated levels instead of the full raster
+            dst.build_overviews([2, 4, 8, 16], Resampling.average)
+            dst.update_tags(ns="rio_overview", resampling="average")
+
+    return rgb_path
 
-def stretch01(x, pmin=2, pmax=98):
-    lo, hi = np.nanpercentile(x, [pmin, pmax])
-    y = (x - lo) / (hi - lo + 1e-12)
-    return np.clip(y, 0, 1).astype(np.float32)
 
+def write_rgb_geotiff(dst, out, window):
+    dst.write(out, window=window)
+
+
+def _grid_fingerprint(ds):
+    """
+    Hash the realized output grid of a still-open dataset. Comparing these
+    across the VV/VH pair catches genuine divergence (size/resolution derive
+    per-source from the GCP geometry) without reopening either output.
+    """
+    fp = (ds.GetGeoTransform(), ds.RasterXSize, ds.RasterYSize, ds.GetProjectionRef())
+    return hashlib.md5(repr(fp).encode()).hexdigest()
+
+
+@lru_cache(maxsize=32)
+def _transformer_from_4326(dst_wkt):
+    """
+    Transformer construction builds a full PROJ pipeline (~10-30 ms); cache
+    it per target CRS so the VV/VH pair (and batch reruns) pay it once.
+    """
+    return Transformer.from_crs("EPSG:4326", dst_wkt, always_xy=True)
+
+
+def clip_to_bbox4326(in_path, out_path, bbox4326, geom4326=None):
+    """
+    Clip to bbox4326 with gdal.Warp, which reads only the windows covering the
+    bbox instead of rasterizing a mask over the whole source (rasterio.mask).
+    An optional non-rectangular geom4326 (shapely, EPSG:4326) is applied as a
+    cutline.
+    """
+    src = gdal.Open(in_path)
+    if src is None:
+        raise RuntimeError(f"GDAL could not open {in_path}")
 
-def clip_to_bbox4326(in_path, out_path, bbox4326):
-    with rasterio.open(in_path) as src:
-        if src.crs is None:
-            raise ValueError(f"{in_path} has no CRS; cannot clip.")
+    srs = src.GetSpatialRef()
+    if srs is None:
+        raise ValueError(f"{in_path} has no CRS; cannot clip.")
 
-        geom4326 = box(*bbox4326)
-        transformer = Transformer.from_crs("EPSG:4326", src.crs, always_xy=True)
+    minlon, minlat, maxlon, maxlat = bbox4326
+
+    warp_kwargs = dict(
+        outputBounds=(minlon, minlat, maxlon, maxlat),
+        outputBoundsSRS="EPSG:4326",
+        multithread=True,
+        # Bound the chunk size so large clips stream block-by-block instead
+        # of materializing the whole clip region
+        warpMemoryLimit=512 << 20,
+        warpOptions=["NUM_THREADS=ALL_CPUS"],
+        creationOptions=GTIFF_CREATION_OPTIONS,
+    )
+
+    cutline_path = None
+    if geom4326 is not None:
+        # A cutline datasource without SRS is interpreted in source raster
+        # coordinates, so reproject the geometry before writing it. The
+        # cached transformer gets whole coordinate arrays from shp_transform,
+        # not per-vertex Python calls
+        transformer = _transformer_from_4326(srs.ExportToWkt())
         geom_src = shp_transform(transformer.transform, geom4326)
+        cutline_path = f"/vsimem/cutline_{os.path.basename(out_path)}.json"
+        fc = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": {}, "geometry": mapping(geom_src)}
+            ],
+        }
+        gdal.FileFromMemBuffer(cutline_path, orjson.dumps(fc))
+        warp_kwargs["cutlineDSName"] = cutline_path
+
+    out = gdal.Warp(out_path, src, **warp_kwargs)
+    if out is None:
+        raise RuntimeError(f"GDAL warp failed for {in_path}")
+    out.FlushCache()
+    fp = _grid_fingerprint(out)
+    out = None
+    src = None
 
-        out_img, out_transform = mask(src, [mapping(geom_src)], crop=True)
+    if cutline_path:
+        gdal.Unlink(cutline_path)
 
-        meta = src.meta.copy()
-        meta.update(
-            height=out_img.shape[1],
-            width=out_img.shape[2],
-            transform=out_transform,
-        )
+    return fp
 
-    with rasterio.open(out_path, "w", **meta) as dst:
-        dst.write(out_img)
 
-    return out_path
+def verify_clip_alignment(vv_clip, vh_clip):
+    """
+    Full metadata cross-check (two dataset opens). The pipelines compare the
+    warp fingerprints instead; keep this around for debugging.
+    """
+    with rasterio.open(vv_clip) as a, rasterio.open(vh_clip) as b:
+        if a.crs != b.crs or a.transform != b.transform or a.width != b.width or a.height != b.height:
+            raise RuntimeError("Clipped VV and VH are not perfectly aligned. Use a shared-window clip if needed.")
 
 
 # ---------------------------------------------- # 
 # --------------- CDSE Related ----------------- #
 # ---------------------------------------------- # 
+# Compiled once: re's internal cache is small and per-call compilation adds up
+# when parsing scene names in batch loops
+_S1_TIME_RE = re.compile(r"_(\d{8}T\d{6})_(\d{8}T\d{6})_")
+
+
+def _parse_s1_timestamp(s):
+    """Parse 'YYYYMMDDThhmmss' by slicing; ~10x faster than strptime."""
+    return datetime(
+        int(s[0:4]), int(s[4:6]), int(s[6:8]),
+        int(s[9:11]), int(s[11:13]), int(s[13:15]),
+        tzinfo=timezone.utc,
+    )
+
+
 def parse_s1_times_from_name(name_or_id):
     """
     Extract sensing start/end from Sentinel-1 name pattern:
     ..._YYYYMMDDThhmmss_YYYYMMDDThhmmss_...
     """
-    m = re.search(r"_(\d{8}T\d{6})_(\d{8}T\d{6})_", name_or_id)
+    m = _S1_TIME_RE.search(name_or_id)
     if not m:
         raise ValueError(f"Could not parse sensing times from: {name_or_id}")
-    t0 = datetime.strptime(m.group(1), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
-    t1 = datetime.strptime(m.group(2), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
-    return t0, t1
+    return _parse_s1_timestamp(m.group(1)), _parse_s1_timestamp(m.group(2))
 
 
 def stac_find_latest_s1_grd_item(bbox4326, datetime_range, stac_url=None):
@@ -139,7 +585,7 @@ def cdse_odata_find_s1_grdh_product(bbox4326, stac_item_id, top=10):
 
     url = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?" + urllib.parse.urlencode(params)
 
-    j = requests.get(url, timeout=60).json()
+    j = orjson.loads(_CDSE_SESSION.get(url, timeout=60).content)
     vals = j.get("value", [])
     if not vals:
         raise RuntimeError("OData returned no products for AOI + sensing time window.")
@@ -158,6 +604,37 @@ def cdse_odata_find_s1_grdh_product(bbox4326, stac_item_id, top=10):
     return best["Id"], best["Name"]
 
 
+def cdse_odata_batch_find(queries, max_workers=8):
+    """
+    Resolve several (bbox4326, stac_item_id) lookups concurrently over the
+    pooled session, so a multi-scene run pays ~1 round-trip instead of N.
+    Returns [(product_id, product_name), ...] in input order.
+    """
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+        return list(pool.map(lambda q: cdse_odata_find_s1_grdh_product(*q), queries))
+
+
+def cdse_product_from_stac_item(item):
+    """
+    Resolve the OData product Id straight from the STAC item (Copernicus
+    items carry it as 'product:id'), skipping the second catalogue query.
+    Returns (product_id, product_name) or None when the property is absent.
+    """
+    product_id = item.properties.get("product:id")
+    if not product_id:
+        return None
+
+    asset = item.assets.get("PRODUCT") or item.assets.get("product")
+    if asset is not None and asset.href:
+        product_name = asset.href.rstrip("/").rsplit("/", 1)[-1]
+    else:
+        product_name = derive_safe_name_from_stac_item(item) + ".SAFE"
+
+    return product_id, product_name
+
+
 def derive_safe_name_from_stac_item(item):
     """
     Try to derive SAFE product name from STAC item.
@@ -169,7 +646,43 @@ def derive_safe_name_from_stac_item(item):
     return safe_base
 
 
+# Pooled session for all CDSE traffic (auth, OData queries, downloads): one
+# TLS connection instead of a fresh handshake per request, plus retries on
+# the gateway errors CDSE intermittently returns
+_CDSE_SESSION = requests.Session()
+_CDSE_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504]),
+    ),
+)
+
+# username -> (access_token, expires_at); tokens are valid for ~10 min, so
+# batch runs shouldn't pay the Keycloak round-trip per scene
+_TOKEN_CACHE = {}
+
+
+def _jwt_exp(token):
+    """
+    Read the 'exp' claim out of a JWT without verifying it (we only need the
+    expiry, the server validates the signature). Returns None on any
+    malformed token rather than raising.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)  # restore stripped base64 padding
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except (IndexError, KeyError, ValueError):
+        return None
+
+
 def cdse_get_access_token(username, password):
+    cached = _TOKEN_CACHE.get(username)
+    if cached and time.time() < cached[1] - 60:
+        return cached[0]
+
     token_url = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
     data = {
         "client_id": "cdse-public",
@@ -177,9 +690,15 @@ def cdse_get_access_token(username, password):
         "username": username,
         "password": password,
     }
-    r = requests.post(token_url, data=data, timeout=60)
+    r = _CDSE_SESSION.post(token_url, data=data, timeout=60)
     r.raise_for_status()
-    return r.json()["access_token"]
+    j = orjson.loads(r.content)
+    token = j["access_token"]
+    # Prefer the token's own exp claim (authoritative, absolute) over the
+    # response-relative expires_in
+    expires_at = _jwt_exp(token) or time.time() + j.get("expires_in", 600)
+    _TOKEN_CACHE[username] = (token, expires_at)
+    return token
 
 
 def cdse_find_product_id_by_name(name):
@@ -190,7 +709,7 @@ def cdse_find_product_id_by_name(name):
     odata_base = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products"
     filter_expr = f"Collection/Name eq 'SENTINEL-1' and Name eq '{name}'"
     url = odata_base + "?" + urllib.parse.urlencode({"$filter": filter_expr})
-    j = requests.get(url, timeout=60).json()
+    j = orjson.loads(_CDSE_SESSION.get(url, timeout=60).content)
     vals = j.get("value", [])
     if not vals:
         return None
@@ -203,30 +722,87 @@ def cdse_download_safe_zip(product_id, out_zip, access_token):
     # CDSE support example uses zipper.dataspace.../Products(<ID>)/$value :contentReference[oaicite:5]{index=5}
     url = f"https://zipper.dataspace.copernicus.eu/odata/v1/Products({product_id})/$value"
 
-    with requests.get(url, headers=headers, stream=True, timeout=(30, 600)) as resp:
+    with _CDSE_SESSION.get(url, headers=headers, stream=True, timeout=(30, 600)) as resp:
         resp.raise_for_status()
         total = int(resp.headers.get("Content-Length", 0))
+        resp.raw.decode_content = True
         got = 0
+        next_report = 0
         with open(out_zip, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=1024 * 1024):
+            # Read the raw stream in 4MB blocks: fewer Python round-trips
+            # than iter_content's 1MB generator steps
+            while True:
+                chunk = resp.raw.read(4 << 20)
                 if not chunk:
-                    continue
+                    break
                 f.write(chunk)
                 got += len(chunk)
-                if total:
+                # Progress once per 64MB; per-chunk float formatting can
+                # dominate CPU on fast links
+                if total and got >= next_report:
                     print(f"\rDownloading SAFE: {100*got/total:6.2f}% ({got/1e6:.1f}/{total/1e6:.1f} MB)", end="")
+                    next_report += 64 << 20
     print("\nSaved:", out_zip)
     return out_zip
 
 
+def _is_plain_4326(src):
+    """True when the dataset is georeferenced in EPSG:4326 without GCPs."""
+    if src.GetGCPCount() > 0:
+        return False
+    srs = src.GetSpatialRef()
+    if srs is None:
+        return False
+    wgs84 = osr.SpatialReference()
+    wgs84.ImportFromEPSG(4326)
+    return bool(srs.IsSame(wgs84))
+
+
 def warp_gcps_clip(src_tif, dst_tif, bbox4326):
     minlon, minlat, maxlon, maxlat = bbox4326
 
+    src = gdal.Open(src_tif)
+    if src is None:
+        raise RuntimeError(f"GDAL could not open {src_tif}")
+
+    # Already geocoded in 4326 with no GCPs: the whole TPS pass would be a
+    # per-pixel identity transform, so crop with a plain windowed copy instead
+    if _is_plain_4326(src):
+        out = gdal.Translate(
+            dst_tif, src,
+            projWin=[minlon, maxlat, maxlon, minlat],
+            projWinSRS="EPSG:4326",
+            # No PREDICTOR here: the band type follows the source, which may
+            # be float dB rather than UInt16 amplitude
+            creationOptions=GTIFF_CREATION_OPTIONS,
+        )
+        if out is None:
+            raise RuntimeError(f"GDAL translate failed for {src_tif}")
+        out.FlushCache()
+        fp = _grid_fingerprint(out)
+        out = None
+        src = None
+
+        return fp
+
+    src = None
+
+    # gdal.Warp rather than rasterio.warp.reproject: rasterio's wrapper does
+    # not expose the TPS transformer or the approximate-transform threshold
+    # that make the GCP path fast
     opts = gdal.WarpOptions(
         tps=True,                 # use GCPs
         srcSRS="EPSG:4326",       # interpret GCP lon/lat
         dstSRS="EPSG:4326",       # keep output in 4326
 
+        # Wrap the exact (slow) per-pixel TPS inverse in an approximate
+        # transformer; 0.125 px error is well under the warper's own tolerance
+        errorThreshold=0.125,
+        transformerOptions=[
+            "SRC_APPROX_ERROR_IN_SRS_UNIT=0",
+            "DST_APPROX_ERROR_IN_PIXEL=0.125",
+        ],
+
         outputBounds=(minlon, minlat, maxlon, maxlat),
         outputBoundsSRS="EPSG:4326",
 
@@ -236,16 +812,24 @@ def warp_gcps_clip(src_tif, dst_tif, bbox4326):
         outputType=gdal.GDT_UInt16,
 
         multithread=True,
-        warpOptions=["NUM_THREADS=ALL_CPUS"],
-        creationOptions=[
-            "TILED=YES",
-            "COMPRESS=ZSTD",
-            "BIGTIFF=IF_SAFER",
+        warpMemoryLimit=1 << 30,
+        warpOptions=[
+            # multithread=True only overlaps I/O with computation; NUM_THREADS
+            # here makes ChunkAndWarpMulti run the resampler itself on all cores
+            "NUM_THREADS=ALL_CPUS",
+            "UNIFIED_SRC_NODATA=YES",
+            "USE_GENERAL_CASE=YES",
+            "OPTIMIZE_SIZE=NO",
         ],
+        # Horizontal differencing roughly halves ZSTD output on UInt16
+        creationOptions=GTIFF_CREATION_OPTIONS + ["PREDICTOR=2"],
     )
 
     out = gdal.Warp(dst_tif, src_tif, options=opts)
     if out is None:
         raise RuntimeError(f"GDAL warp failed for {src_tif}")
     out.FlushCache()
-    out = None
\ No newline at end of file
+    fp = _grid_fingerprint(out)
+    out = None
+
+    return fp
\ No newline at end of file
@@ -1,4 +1,5 @@
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from cdse_gdal import cdse_gdal
 from cog_gdal import cog_gdal
 from asf_pyrosar import asf_pyrosar
@@ -9,7 +10,9 @@ def main(bbox4326, date_start, date_end, target_crs, pipeline):
     if pipeline not in ["GDAL", "ASF", "CDSE", "COG"]:
         raise ValueError(f"Invalid pipeline name.")
     
-    now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Microseconds keep workdirs unique when run_jobs launches several
+    # pipelines within the same second
+    now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     workdir = now + "_S1_CDSE_pyroSAR"
     
     if pipeline == "GDAL":
@@ -28,6 +31,24 @@ def main(bbox4326, date_start, date_end, target_crs, pipeline):
     cdse_pyrosar(bbox4326, date_start, date_end, target_crs, workdir)
 
 
+def run_jobs(jobs, target_crs, pipeline, max_workers=2):
+    """
+    Run several (bbox4326, date_start, date_end) jobs concurrently. Each job
+    alternates between I/O (download, OData) and CPU (warp, SNAP), so a small
+    thread pool overlaps the download of one scene with the warp of another;
+    the warps themselves run in GDAL C code and release the GIL. For
+    SNAP-heavy batches the *_batch variants in asf_pyrosar/cdse_pyrosar
+    pipeline download against geocode explicitly and remain the better fit.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(main, bbox4326, date_start, date_end, target_crs, pipeline)
+            for bbox4326, date_start, date_end in jobs
+        ]
+        for f in futures:
+            f.result()
+
+
 
 if __name__ == "__main__":
     bbox4326 = [21.650108363494013, 40.66771202000291, 21.748606076871027, 40.7560964624422]